@@ -1,30 +1,61 @@
-from fastapi import FastAPI, UploadFile, File
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:  # not available on Windows dev machines
+    uvloop = None
+
+from fastapi import FastAPI, HTTPException, Request, Response, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
-import fitz  # PyMuPDF
-import docx
+import asyncio
+import cachetools
+import collections
+import functools
+import hashlib
+import httpx
 import io
-import os
 import json
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.units import inch
-from openai import OpenAI
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
+import math
+import orjson
+import os
+import queue
+import re
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from openai import AsyncOpenAI, APIConnectionError, APIStatusError, RateLimitError
+from reportlab import rl_config
+from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
 from reportlab.lib.units import inch
-from fastapi.responses import StreamingResponse
+from reportlab.platypus import (
+    BaseDocTemplate,
+    Frame,
+    HRFlowable,
+    PageBreak,
+    PageTemplate,
+    Paragraph,
+    Spacer,
+    Table,
+    TableStyle,
+)
+
+# Skip ReportLab's per-assignment attribute validation in the hot build
+# path, and make output byte-identical for identical input (no embedded
+# timestamps) so the ETag/PDF caches stay stable across rebuilds.
+rl_config.shapeChecking = 0
+rl_config.invariant = 1
 
 
 # ---------------------------
 # FASTAPI APP
 # ---------------------------
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 origins = [
     "http://localhost:5173",
@@ -43,12 +74,121 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class PathExcludingGZipMiddleware:
+    """GZip wrapper that bypasses compression on streaming routes: zlib
+    buffers small writes internally, which would hold NDJSON events back
+    until enough bytes accumulate and defeat incremental delivery."""
+
+    def __init__(self, app, minimum_size: int = 1024, exclude_paths: tuple = ()):
+        self.app = app
+        self.exclude_paths = frozenset(exclude_paths)
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+        else:
+            await self.gzip(scope, receive, send)
+
+
+# Text-heavy report PDFs and JSON analyses compress 30-50%.
+app.add_middleware(
+    PathExcludingGZipMiddleware,
+    minimum_size=1024,
+    exclude_paths=("/analyze-resume/stream",),
+)
+
 
 # ---------------------------
 # OPENAI CLIENT
 # ---------------------------
+# Explicit pool: the default httpx limits are sized for light use and
+# re-negotiate TLS on bursts. HTTP/2 multiplexes concurrent completions
+# over one connection.
+
+http_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+    timeout=60.0,
+)
+
+client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client)
+
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+@app.on_event("shutdown")
+async def _close_http_client():
+    await http_client.aclose()
+
+
+# ---------------------------
+# OPENAI RATE LIMITING
+# ---------------------------
+# Concurrency is capped with a semaphore and request/token budgets are
+# enforced with per-minute buckets, so a burst of uploads queues against
+# our own limits instead of slamming into OpenAI 429s.
+
+MAX_CONCURRENCY = 10
+MAX_REQUESTS_PER_MINUTE = 500
+MAX_TOKENS_PER_MINUTE = 200_000
+RETRY_ATTEMPTS = 3
+
+_openai_semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+
+
+class TokenBucket:
+    """Per-minute budget that refills continuously; consume() sleeps
+    until the requested amount is available."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.available = per_minute
+        self.refill_rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def consume(self, amount: float = 1.0) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.available = min(
+                    self.capacity,
+                    self.available + (now - self.updated) * self.refill_rate,
+                )
+                self.updated = now
+                if self.available >= amount:
+                    self.available -= amount
+                    return
+                await asyncio.sleep((amount - self.available) / self.refill_rate)
+
+
+_request_bucket = TokenBucket(MAX_REQUESTS_PER_MINUTE)
+_token_bucket = TokenBucket(MAX_TOKENS_PER_MINUTE)
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+async def _throttled_openai_call(make_call, estimated_tokens: int):
+    """Run an OpenAI call under the semaphore and rate buckets, retrying
+    429s, 5xx and connection errors with exponential backoff."""
+    await _request_bucket.consume(1)
+    await _token_bucket.consume(estimated_tokens)
+
+    async with _openai_semaphore:
+        last_error = None
+        for attempt in range(RETRY_ATTEMPTS):
+            try:
+                return await make_call()
+            except (RateLimitError, APIConnectionError) as exc:
+                last_error = exc
+            except APIStatusError as exc:
+                if exc.status_code < 500:
+                    raise
+                last_error = exc
+            if attempt < RETRY_ATTEMPTS - 1:
+                await asyncio.sleep(2 ** attempt)
+        raise last_error
 
 
 # ---------------------------
@@ -70,26 +210,209 @@ class AnalysisResult(BaseModel):
 # PDF & DOCX TEXT EXTRACTION
 # ---------------------------
 
-def extract_text_from_pdf(file_bytes: bytes) -> str:
-    doc = fitz.open(stream=file_bytes, filetype="pdf")
-    text = ""
-    for page in doc:
-        text += page.get_text()
-    return text
+# Bounded pool for CPU-heavy work (text extraction, PDF rendering).
+# asyncio.to_thread's default executor grows with demand; a fixed pool
+# keeps memory predictable when many requests land at once.
+_worker_pool = ThreadPoolExecutor(max_workers=(os.cpu_count() or 1) * 2)
+
+
+async def _run_in_worker(func, /, *args):
+    return await asyncio.get_running_loop().run_in_executor(_worker_pool, func, *args)
+
+
+# Extraction stops once this many characters are collected (~4k tokens);
+# analyze_with_ai clamps to its token budget anyway, so anything past this
+# would be extracted only to be thrown away.
+RESUME_CHAR_BUDGET = 20000
+
+
+@functools.lru_cache(maxsize=1)
+def _fitz():
+    # Imported on first use: PyMuPDF loads a large C library and font
+    # caches, which workers that never see a PDF shouldn't pay for.
+    import fitz  # PyMuPDF
+
+    # Malformed resumes otherwise spray repair warnings to stderr from
+    # inside the C layer, which serializes on an internal lock.
+    fitz.TOOLS.mupdf_display_errors(False)
+    return fitz
+
+
+def extract_text_from_pdf(fileobj, max_chars: int = RESUME_CHAR_BUDGET) -> str:
+    fitz = _fitz()
+
+    # MuPDF needs a contiguous buffer, so the spooled upload is read here,
+    # inside the worker thread, rather than on the event loop. Single join
+    # instead of repeated += (quadratic on long PDFs), and the plain "text"
+    # extractor skips layout/image work we never use.
+    file_bytes = fileobj if isinstance(fileobj, (bytes, bytearray)) else fileobj.read()
+    with fitz.open(stream=file_bytes, filetype="pdf") as doc:
+        parts: list[str] = []
+        total = 0
+        for page in doc:
+            text = page.get_text("text", sort=False, flags=fitz.TEXT_PRESERVE_WHITESPACE)
+            parts.append(text)
+            total += len(text)
+            if total >= max_chars:
+                break
+        return "\n".join(parts)[:max_chars]
+
+
+def extract_text_from_docx(fileobj, max_chars: int = RESUME_CHAR_BUDGET) -> str:
+    # A DOCX is a zip around word/document.xml; pulling the w:t text nodes
+    # straight out of it skips building python-docx's full object graph.
+    # Takes a seekable binary file object, e.g. UploadFile's spooled temp
+    # file, so the upload never has to be copied into a bytes blob.
+    try:
+        with zipfile.ZipFile(fileobj) as z, z.open("word/document.xml") as f:
+            parts: list[str] = []
+            total = 0
+            for _, elem in ET.iterparse(f):
+                if elem.tag.endswith("}t") and elem.text:
+                    parts.append(elem.text)
+                    total += len(elem.text)
+                elif elem.tag.endswith("}p"):
+                    parts.append("\n")
+                    total += 1
+                elem.clear()
+                if total >= max_chars:
+                    break
+            return "".join(parts)[:max_chars]
+    except (zipfile.BadZipFile, KeyError, ET.ParseError):
+        fileobj.seek(0)
+        return _extract_text_from_docx_fallback(fileobj, max_chars)
+
+
+def _extract_text_from_docx_fallback(fileobj, max_chars: int) -> str:
+    import docx
+
+    document = docx.Document(fileobj)
+    parts: list[str] = []
+    total = 0
+    for p in document.paragraphs:
+        parts.append(p.text)
+        total += len(p.text) + 1
+        if total >= max_chars:
+            break
+    return "\n".join(parts)[:max_chars]
+
+
+# ---------------------------
+# ANALYSIS RESULT CACHE
+# ---------------------------
+# Two tiers, both in-process: an exact cache keyed by the SHA256 of the
+# normalized resume text, and a semantic cache of (embedding, result) pairs
+# matched by cosine similarity. A hit on either tier skips the whole
+# OpenAI round trip.
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+SEMANTIC_SIMILARITY_THRESHOLD = 0.92
+
+# TTL-bounded so a long-lived worker can't accumulate results forever;
+# entries are cheap to recompute after expiry.
+_exact_cache: cachetools.TTLCache = cachetools.TTLCache(maxsize=1024, ttl=3600)
+_semantic_cache: collections.deque = collections.deque(maxlen=1024)
+
+
+def normalize_resume_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
 
 
-def extract_text_from_docx(file_bytes: bytes) -> str:
-    file_stream = io.BytesIO(file_bytes)
-    document = docx.Document(file_stream)
-    return "\n".join(p.text for p in document.paragraphs)
+async def _embed_text(text: str) -> list[float]:
+    response = await _throttled_openai_call(
+        lambda: client.embeddings.create(model=EMBEDDING_MODEL, input=text),
+        estimated_tokens=_estimate_tokens(text),
+    )
+    return response.data[0].embedding
+
+
+def _vector_norm(v: list[float]) -> float:
+    return math.sqrt(sum(x * x for x in v))
+
+
+def _scan_semantic_cache(embedding: list[float], embedding_norm: float) -> str | None:
+    """Cosine scan over the stored embeddings; pure-Python over up to 1024
+    1536-dim vectors, so callers run this on the worker pool, never the
+    event loop. Stored norms are precomputed at insert time."""
+    for stored_embedding, stored_norm, stored_json in list(_semantic_cache):
+        denom = embedding_norm * stored_norm
+        if not denom:
+            continue
+        dot = sum(x * y for x, y in zip(embedding, stored_embedding))
+        if dot / denom > SEMANTIC_SIMILARITY_THRESHOLD:
+            return stored_json
+    return None
+
+
+def _store_cached_analysis(key: str, embedding: list[float], result: AnalysisResult) -> None:
+    serialized = result.model_dump_json()
+    _exact_cache[key] = serialized
+    _semantic_cache.append((embedding, _vector_norm(embedding), serialized))
 
 
 # ---------------------------
 # AI ANALYSIS FUNCTION
 # ---------------------------
 
-def analyze_with_ai(resume_text: str) -> AnalysisResult:
-    prompt = f"""
+RESUME_TOKEN_BUDGET = 4000
+CHAT_MODEL = "gpt-4.1-mini"
+
+# Schema-constrained output: the model cannot emit JSON that fails
+# AnalysisResult validation, so no reviewer/summarize pre-pass is needed.
+_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "AnalysisResult",
+        "schema": AnalysisResult.model_json_schema(),
+    },
+}
+
+
+@functools.lru_cache(maxsize=1)
+def _token_encoding():
+    import tiktoken
+    return tiktoken.get_encoding("o200k_base")  # gpt-4.1 family
+
+
+def _compress_resume_text(text: str) -> str:
+    # Collapse run-on spaces/tabs and trailing whitespace before line
+    # breaks — extractor output is full of both, and every surviving
+    # character is a token we pay for twice (prompt in, echo out).
+    return re.sub(r"\s+\n", "\n", re.sub(r"[ \t]+", " ", text)).strip()
+
+
+def clamp_resume_text(text: str, max_tokens: int = RESUME_TOKEN_BUDGET) -> str:
+    text = _compress_resume_text(text)
+    tokens = _token_encoding().encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    # Tell the model the cut was ours, not a malformed resume.
+    return (
+        f"[Resume truncated to the first ~{max_tokens} tokens]\n"
+        + _token_encoding().decode(tokens[:max_tokens])
+    )
+
+
+async def _check_caches(resume_text: str) -> tuple[str, list[float] | None, AnalysisResult | None]:
+    """Return (cache_key, embedding, cached result); embedding is None on an exact hit."""
+    normalized = normalize_resume_text(resume_text)
+    cache_key = hashlib.sha256(normalized.encode()).hexdigest()
+
+    if cache_key in _exact_cache:
+        return cache_key, None, AnalysisResult.model_validate_json(_exact_cache[cache_key])
+
+    embedding = await _embed_text(normalized)
+    cached_json = await _run_in_worker(_scan_semantic_cache, embedding, _vector_norm(embedding))
+    cached = AnalysisResult.model_validate_json(cached_json) if cached_json else None
+    return cache_key, embedding, cached
+
+
+# Static prompt parts as constants: OpenAI's automatic prompt caching
+# only matches a byte-identical prefix, so the instructions must precede
+# the variable resume text and never be re-rendered differently.
+_SYSTEM_MESSAGE = {"role": "system", "content": "You are an expert resume analyzer."}
+
+_PROMPT_PREFIX = """
 You are a professional resume reviewer.
 
 Analyze this resume and return STRICT JSON with keys:
@@ -102,132 +425,580 @@ Analyze this resume and return STRICT JSON with keys:
 - improvedResume (full improved resume)
 
 Resume:
-\"\"\"{resume_text}\"\"\"
-"""
+\"\"\""""
+
+_PROMPT_SUFFIX = '\"\"\"\n'
+
+
+def _build_analysis_prompt(resume_text: str) -> str:
+    return _PROMPT_PREFIX + resume_text + _PROMPT_SUFFIX
+
 
-    response = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        messages=[
-            {"role": "system", "content": "You are an expert resume analyzer."},
-            {"role": "user", "content": prompt},
-        ],
-        response_format={"type": "json_object"}
+async def _analyze_single(resume_text: str) -> AnalysisResult:
+    prompt = _build_analysis_prompt(resume_text)
+
+    response = await _throttled_openai_call(
+        lambda: client.chat.completions.create(
+            model=CHAT_MODEL,
+            messages=[
+                _SYSTEM_MESSAGE,
+                {"role": "user", "content": prompt},
+            ],
+            response_format=_RESPONSE_FORMAT,
+        ),
+        estimated_tokens=_estimate_tokens(prompt) + RESUME_TOKEN_BUDGET,
     )
 
-    data = json.loads(response.choices[0].message.content)
+    data = orjson.loads(response.choices[0].message.content)
     return AnalysisResult(**data)
 
 
+def _build_batch_prompt(texts: list[str]) -> str:
+    resumes = "\n\n".join(
+        f'Resume {i + 1}:\n\"\"\"{text}\"\"\"' for i, text in enumerate(texts)
+    )
+    return f"""
+You are a professional resume reviewer.
+
+Analyze each of the {len(texts)} resumes below. Return STRICT JSON of the form
+{{"results": [...]}} with exactly one entry per resume, in order. Each entry
+must have keys:
+- score (0-100)
+- skills (list of skills)
+- summary (text)
+- strengths (list)
+- weaknesses (list)
+- suggestions (list)
+- improvedResume (full improved resume)
+
+{resumes}
+"""
+
+
+async def _analyze_batch(texts: list[str]) -> list[AnalysisResult]:
+    if len(texts) == 1:
+        return [await _analyze_single(texts[0])]
+
+    prompt = _build_batch_prompt(texts)
+    response = await _throttled_openai_call(
+        lambda: client.chat.completions.create(
+            model=CHAT_MODEL,
+            messages=[
+                _SYSTEM_MESSAGE,
+                {"role": "user", "content": prompt},
+            ],
+            # json_object here: the per-result schema can't describe the
+            # wrapping {"results": [...]} array.
+            response_format={"type": "json_object"},
+        ),
+        estimated_tokens=_estimate_tokens(prompt) + len(texts) * RESUME_TOKEN_BUDGET,
+    )
+
+    data = orjson.loads(response.choices[0].message.content)
+    results = [AnalysisResult(**item) for item in data["results"]]
+    if len(results) != len(texts):
+        raise ValueError(f"expected {len(texts)} batch results, got {len(results)}")
+    return results
+
+
+class BatchAggregator:
+    """Coalesces resumes that arrive within a short window into one chat
+    completion, so K concurrent uploads cost one request against the RPM
+    limit instead of K."""
+
+    def __init__(self, batch_size: int = 8, flush_ms: int = 50):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_ms / 1000.0
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._worker: asyncio.Task | None = None
+
+    async def analyze(self, resume_text: str) -> AnalysisResult:
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._drain())
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((resume_text, future))
+        return await future
+
+    async def _drain(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                results = await _analyze_batch([text for text, _ in batch])
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+            else:
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+
+
+_batch_aggregator = BatchAggregator()
+
+
+async def analyze_with_ai(resume_text: str) -> AnalysisResult:
+    resume_text = clamp_resume_text(resume_text)
+    cache_key, embedding, cached = await _check_caches(resume_text)
+    if cached is not None:
+        return cached
+
+    result = await _batch_aggregator.analyze(resume_text)
+    _store_cached_analysis(cache_key, embedding, result)
+    return result
+
+
+def _ndjson_event(payload: dict) -> bytes:
+    return orjson.dumps(payload) + b"\n"
+
+
+_JSON_DECODER = json.JSONDecoder()
+_JSON_WS = " \t\r\n"
+
+
+def _completed_fields(buffer: str) -> dict:
+    """Best-effort scan of a partial JSON object for complete top-level
+    "key": value pairs, so fields can be emitted before the object closes."""
+    fields: dict = {}
+    i = buffer.find("{")
+    if i < 0:
+        return fields
+    i += 1
+    while True:
+        while i < len(buffer) and buffer[i] in _JSON_WS + ",":
+            i += 1
+        if i >= len(buffer) or buffer[i] != '"':
+            return fields
+        try:
+            key, i = _JSON_DECODER.raw_decode(buffer, i)
+        except ValueError:
+            return fields
+        while i < len(buffer) and buffer[i] in _JSON_WS:
+            i += 1
+        if i >= len(buffer) or buffer[i] != ":":
+            return fields
+        i += 1
+        while i < len(buffer) and buffer[i] in _JSON_WS:
+            i += 1
+        try:
+            value, i = _JSON_DECODER.raw_decode(buffer, i)
+        except ValueError:
+            return fields
+        if isinstance(value, (int, float)) and i >= len(buffer):
+            # A number ending at the buffer edge may still be streaming in.
+            return fields
+        fields[key] = value
+
+
+async def analysis_event_stream(resume_text: str):
+    """Yield NDJSON events: 'delta' per streamed token batch, then one 'result'."""
+    resume_text = clamp_resume_text(resume_text)
+    cache_key, embedding, cached = await _check_caches(resume_text)
+    if cached is not None:
+        yield _ndjson_event({"event": "result", "data": cached.model_dump()})
+        return
+
+    prompt = _build_analysis_prompt(resume_text)
+    stream = await _throttled_openai_call(
+        lambda: client.chat.completions.create(
+            model=CHAT_MODEL,
+            messages=[
+                _SYSTEM_MESSAGE,
+                {"role": "user", "content": prompt},
+            ],
+            response_format=_RESPONSE_FORMAT,
+            stream=True,
+        ),
+        estimated_tokens=_estimate_tokens(prompt) + RESUME_TOKEN_BUDGET,
+    )
+
+    parts = []
+    emitted: set[str] = set()
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            parts.append(chunk.choices[0].delta.content)
+            for key, value in _completed_fields("".join(parts)).items():
+                if key not in emitted:
+                    emitted.add(key)
+                    yield _ndjson_event({"event": "partial", "key": key, "value": value})
+
+    result = AnalysisResult(**orjson.loads("".join(parts)))
+    if embedding is not None:
+        _store_cached_analysis(cache_key, embedding, result)
+    yield _ndjson_event({"event": "result", "data": result.model_dump()})
+
+
 # ---------------------------
 # API: UPLOAD + ANALYZE RESUME
 # ---------------------------
 
-@app.post("/analyze-resume", response_model=AnalysisResult)
-async def analyze_resume(file: UploadFile = File(...)):
-    file_bytes = await file.read()
-    fname = file.filename.lower()
+MAX_UPLOAD_BYTES = 10_000_000
+
+# Full-pipeline memoization: users iterate on the same resume file, so an
+# exact re-upload (same bytes) skips extraction and the LLM entirely.
+# TTL-bounded like the text-level caches: entries hold the full serialized
+# result (improvedResume included), the largest values we cache.
+_file_result_cache: cachetools.TTLCache = cachetools.TTLCache(maxsize=1024, ttl=3600)
+
+
+# Smallest plausible real document; anything under this can't contain a resume.
+MIN_UPLOAD_BYTES = 200
 
-    if fname.endswith(".pdf"):
-        resume_text = extract_text_from_pdf(file_bytes)
+_MAGIC_BYTES = (b"%PDF", b"PK\x03\x04")  # PDF header / zip (DOCX) header
 
-    elif fname.endswith(".docx"):
-        resume_text = extract_text_from_docx(file_bytes)
+
+def _validate_upload(file: UploadFile) -> None:
+    """Raises HTTPException before a single byte is read, so an unsupported
+    or oversized upload is rejected at near-zero cost."""
+    fname = (file.filename or "").lower()
+
+    if not fname.endswith((".pdf", ".docx")):
+        raise HTTPException(status_code=415, detail="Only PDF or DOCX files are supported")
+
+    if file.size and file.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="File exceeds the 10 MB upload limit")
+
+    if file.size and file.size < MIN_UPLOAD_BYTES:
+        raise HTTPException(status_code=422, detail="File is too small to be a resume")
+
+
+async def _check_magic_bytes(file: UploadFile) -> None:
+    """Cheap 4-byte sniff so a renamed JPEG never reaches a parser."""
+    head = await file.read(4)
+    await file.seek(0)
+    if head not in _MAGIC_BYTES:
+        raise HTTPException(status_code=415, detail="File content is not PDF or DOCX")
+
+
+async def _file_digest(file: UploadFile) -> str:
+    """BLAKE2b of the raw upload, streamed from the spool and rewound."""
+    hasher = hashlib.blake2b(digest_size=16)
+    while chunk := await file.read(1 << 20):
+        hasher.update(chunk)
+    await file.seek(0)
+    return hasher.hexdigest()
+
+
+async def _read_resume_text(file: UploadFile) -> str:
+    """Extract text from an upload; raises HTTPException for bad uploads."""
+    _validate_upload(file)
+    await _check_magic_bytes(file)
+
+    if (file.filename or "").lower().endswith(".pdf"):
+        resume_text = await _run_in_worker(extract_text_from_pdf, file.file)
 
     else:
-        return {"error": "Only PDF or DOCX files are supported"}
+        resume_text = await _run_in_worker(extract_text_from_docx, file.file)
 
     if not resume_text.strip():
-        return {"error": "Could not read text from file"}
+        raise HTTPException(status_code=422, detail="Could not read text from file")
+
+    return resume_text
+
+
+@app.post("/analyze-resume", response_model=AnalysisResult)
+async def analyze_resume(file: UploadFile = File(...)):
+    _validate_upload(file)
+
+    digest = await _file_digest(file)
+    cached = _file_result_cache.get(digest)
+    if cached is not None:
+        return AnalysisResult.model_validate_json(cached)
+
+    resume_text = await _read_resume_text(file)
 
-    result = analyze_with_ai(resume_text)
+    result = await analyze_with_ai(resume_text)
+    _file_result_cache[digest] = result.model_dump_json()
     return result
 
 
+@app.post("/analyze-resume/stream")
+async def analyze_resume_stream(file: UploadFile = File(...)):
+    resume_text = await _read_resume_text(file)
+
+    return StreamingResponse(
+        analysis_event_stream(resume_text),
+        media_type="application/x-ndjson",
+    )
+
+
 # ---------------------------
 # API: DOWNLOAD PDF REPORT
 # ---------------------------
 
-@app.post("/download-report")
-async def download_report(data: AnalysisResult):
-
-    buffer = io.BytesIO()
-
-    # Document settings + custom margins
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=letter,
-        leftMargin=45,
-        rightMargin=45,
-        topMargin=70,
-        bottomMargin=50
-    )
+PDF_CHUNK_SIZE = 64 * 1024
+
+# Reusable build sinks: ReportLab writes many small chunks, and a fresh
+# BytesIO per request meant constant re-growing under load. Since the
+# report cache needs the full bytes anyway, a bounded LIFO pool of
+# already-grown buffers replaces the per-request spool.
+_BUFFER_POOL: queue.LifoQueue = queue.LifoQueue(maxsize=16)
+
+
+def _acquire_buffer() -> io.BytesIO:
+    try:
+        return _BUFFER_POOL.get_nowait()
+    except queue.Empty:
+        return io.BytesIO()
+
+
+def _release_buffer(buf: io.BytesIO) -> None:
+    buf.seek(0)
+    buf.truncate(0)
+    try:
+        _BUFFER_POOL.put_nowait(buf)
+    except queue.Full:
+        pass
+
+# Page geometry computed once. Only built-in fonts are used, so there is
+# no per-request font registration to avoid; Frame/PageTemplate objects
+# are stateful during a build and therefore created per document, but
+# from these precomputed numbers.
+_PAGE_MARGINS = {"leftMargin": 45, "rightMargin": 45, "topMargin": 70, "bottomMargin": 50}
+_FRAME_GEOMETRY = (
+    _PAGE_MARGINS["leftMargin"],
+    _PAGE_MARGINS["bottomMargin"],
+    letter[0] - _PAGE_MARGINS["leftMargin"] - _PAGE_MARGINS["rightMargin"],
+    letter[1] - _PAGE_MARGINS["topMargin"] - _PAGE_MARGINS["bottomMargin"],
+)
 
-    styles = getSampleStyleSheet()
 
-    # -----------------------------
-    #    CUSTOM ULTRA PREMIUM STYLES
-    # -----------------------------
+def _make_doc(buffer) -> BaseDocTemplate:
+    doc = BaseDocTemplate(buffer, pagesize=letter, **_PAGE_MARGINS)
+    frame = Frame(*_FRAME_GEOMETRY, id="normal")
+    doc.addPageTemplates([PageTemplate(id="report", frames=[frame])])
+    return doc
+
+# -----------------------------
+#    CUSTOM ULTRA PREMIUM STYLES
+# -----------------------------
+# Built once at import time: every report uses the same styles, and
+# re-running getSampleStyleSheet() plus six ParagraphStyle constructors
+# per request was pure overhead in the hot path.
+
+_STYLES = getSampleStyleSheet()
+
+_TITLE_STYLE = ParagraphStyle(
+    "title_style",
+    parent=_STYLES["Title"],
+    fontSize=28,
+    leading=34,
+    textColor="#C9A227",
+    alignment=1,  # center
+)
 
-    title_style = ParagraphStyle(
-        "title_style",
-        parent=styles["Title"],
-        fontSize=28,
-        leading=34,
-        textColor="#C9A227",
-        alignment=1,  # center
-    )
+_HEADER_STYLE = ParagraphStyle(
+    "header_style",
+    parent=_STYLES["Heading2"],
+    fontSize=18,
+    leading=22,
+    textColor="#2E2E2E",
+)
 
-    header_style = ParagraphStyle(
-        "header_style",
-        parent=styles["Heading2"],
-        fontSize=18,
-        leading=22,
-        textColor="#2E2E2E",
-    )
+_SUBHEADER_STYLE = ParagraphStyle(
+    "subheader_style",
+    parent=_STYLES["Heading3"],
+    fontSize=14,
+    leading=18,
+    textColor="#444",
+)
 
-    subheader_style = ParagraphStyle(
-        "subheader_style",
-        parent=styles["Heading3"],
-        fontSize=14,
-        leading=18,
-        textColor="#444",
-    )
+_BODY_STYLE = ParagraphStyle(
+    "body_style",
+    parent=_STYLES["BodyText"],
+    fontSize=11.5,
+    leading=16,
+    textColor="#333",
+)
 
-    body_style = ParagraphStyle(
-        "body_style",
-        parent=styles["BodyText"],
-        fontSize=11.5,
-        leading=16,
-        textColor="#333",
-    )
+_BULLET_STYLE = ParagraphStyle(
+    "bullet_style",
+    parent=_STYLES["BodyText"],
+    fontSize=11.5,
+    leading=16,
+    leftIndent=15
+)
+
+_HIGHLIGHT_BOX_STYLE = ParagraphStyle(
+    "highlight",
+    parent=_STYLES["BodyText"],
+    backColor="#FFF8E1",
+    borderColor="#C9A227",
+    borderWidth=1,
+    borderPadding=8,
+    fontSize=12,
+    leading=18,
+    spaceAfter=12,
+)
+
+_SCORE_TABLE_STYLE = TableStyle([
+    ("BACKGROUND", (0, 0), (-1, -1), colors.Color(0.95, 0.88, 0.55)),
+    ("BOX", (0, 0), (-1, -1), 2, colors.Color(0.8, 0.65, 0.15)),
+    ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+    ("TOPPADDING", (0, 0), (-1, -1), 12),
+    ("BOTTOMPADDING", (0, 0), (-1, -1), 12),
+])
+
+_BADGE_STYLE = ParagraphStyle(
+    "badge",
+    backColor="#EFEFEF",
+    borderColor="#C9A227",
+    borderWidth=1,
+    borderRadius=5,
+    alignment=1,
+    padding=4,
+    leading=14,
+)
+
+_SKILL_TABLE_STYLE = TableStyle([("ALIGN", (0, 0), (-1, -1), "CENTER")])
+
+# "fpdf2" selects a much lighter layout engine than ReportLab Platypus
+# (roughly 5x faster builds); ReportLab stays the default pending a visual
+# sign-off on the fpdf2 report.
+PDF_BACKEND = os.getenv("PDF_BACKEND", "reportlab").lower()
+
+
+def _build_report_fpdf(data: AnalysisResult) -> bytes:
+    from fpdf import FPDF
+
+    pdf = FPDF(format="letter")
+    pdf.set_auto_page_break(auto=True, margin=18)
+    pdf.add_page()
+    epw = pdf.epw  # effective page width
+
+    pdf.set_font("Helvetica", "B", 24)
+    pdf.set_text_color(201, 162, 39)
+    pdf.cell(epw, 14, "Resume Analysis Report", align="C", new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(6)
+
+    # Gold score banner
+    pdf.set_fill_color(242, 224, 140)
+    pdf.set_draw_color(204, 166, 38)
+    pdf.set_text_color(46, 46, 46)
+    pdf.set_font("Helvetica", "B", 15)
+    pdf.cell(epw, 14, f"Your Resume Score: {data.score}/100", align="C",
+             fill=True, border=1, new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(8)
+
+    def section(title: str) -> None:
+        pdf.set_font("Helvetica", "B", 15)
+        pdf.set_text_color(46, 46, 46)
+        pdf.cell(epw, 9, title, new_x="LMARGIN", new_y="NEXT")
+        pdf.ln(1)
+        pdf.set_font("Helvetica", size=11)
+        pdf.set_text_color(51, 51, 51)
+
+    def bullets(items: list[str]) -> None:
+        for item in items:
+            pdf.multi_cell(epw, 6, f"- {item}", new_x="LMARGIN", new_y="NEXT")
+        pdf.ln(4)
+
+    section("Professional Summary")
+    pdf.multi_cell(epw, 6, data.summary, new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(4)
+
+    if data.strengths:
+        section("Key Strengths")
+        bullets(data.strengths)
+
+    section("Areas for Improvement")
+    bullets(data.weaknesses)
+
+    section("Detected Skills")
+    pdf.multi_cell(epw, 6, ", ".join(data.skills), new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(4)
+
+    section("Suggestions for Improvement")
+    bullets(data.suggestions)
+
+    pdf.add_page()
+    pdf.set_font("Helvetica", "B", 24)
+    pdf.set_text_color(201, 162, 39)
+    pdf.cell(epw, 14, "AI-Optimized Resume", align="C", new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(6)
+    pdf.set_font("Helvetica", size=11)
+    pdf.set_text_color(51, 51, 51)
+    pdf.multi_cell(epw, 6, data.improvedResume, new_x="LMARGIN", new_y="NEXT")
+
+    return bytes(pdf.output())
+
+
+# Rendered reports keyed by the ETag of their AnalysisResult payload, so
+# re-downloads of the same report skip the build entirely. In-process
+# rather than Redis: this runs as a single worker. LRU-bounded so a long
+# run of distinct reports can't grow memory without limit.
+_pdf_cache: cachetools.LRUCache = cachetools.LRUCache(maxsize=256)
+
+
+# Escapes XML specials and converts newlines to <br/> in one translate
+# pass; everything user- or model-supplied goes through this before being
+# interpolated into ReportLab's XML mini-markup.
+_MARKUP_TRANS = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", "\n": "<br/>"})
+
+
+def _markup(text: str) -> str:
+    return text.translate(_MARKUP_TRANS)
+
+
+def _bullet_paragraph(items: list[str]) -> Paragraph:
+    # One flowable for the whole list: each Paragraph costs an XML parse,
+    # style bind, and layout pass inside doc.build. Items are escaped so a
+    # stray < or & in LLM output can't abort the build.
+    return Paragraph("<br/>".join(f"• {_markup(item)}" for item in items), _BULLET_STYLE)
+
+
+def _report_etag(data: AnalysisResult) -> str:
+    return hashlib.sha256(data.model_dump_json().encode()).hexdigest()
 
-    bullet_style = ParagraphStyle(
-        "bullet_style",
-        parent=styles["BodyText"],
-        fontSize=11.5,
-        leading=16,
-        leftIndent=15
-    )
 
-    highlight_box_style = ParagraphStyle(
-        "highlight",
-        parent=styles["BodyText"],
-        backColor="#FFF8E1",
-        borderColor="#C9A227",
-        borderWidth=1,
-        borderPadding=8,
-        fontSize=12,
-        leading=18,
-        spaceAfter=12,
+def _pdf_response(pdf_bytes: bytes, etag: str) -> StreamingResponse:
+    return StreamingResponse(
+        _iter_file_chunks(io.BytesIO(pdf_bytes)),
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": "attachment; filename=UltraPremium_Resume_Report.pdf",
+            "ETag": etag,
+        },
     )
 
+
+def _iter_file_chunks(fileobj):
+    try:
+        while True:
+            chunk = fileobj.read(PDF_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        fileobj.close()
+
+
+def _build_report_reportlab(data: AnalysisResult) -> bytes:
+    """Assemble and render the ReportLab report; runs entirely in a worker
+    thread since flowable construction is CPU work too."""
+    buffer = _acquire_buffer()
+
+    doc = _make_doc(buffer)
+
     # -----------------------------
     # PAGE HEADER + TITLE
     # -----------------------------
 
     elements = []
 
-    elements.append(Paragraph("Resume Analysis Report", title_style))
+    elements.append(Paragraph("Resume Analysis Report", _TITLE_STYLE))
     elements.append(Spacer(1, 0.35 * inch))
 
     # -----------------------------
@@ -235,7 +1006,7 @@ async def download_report(data: AnalysisResult):
     # -----------------------------
 
     score_panel = [
-        [Paragraph(f"<b>Your Resume Score: {data.score}/100</b>", header_style)]
+        [Paragraph(f"<b>Your Resume Score: {data.score}/100</b>", _HEADER_STYLE)]
     ]
 
     table = Table(
@@ -243,57 +1014,52 @@ async def download_report(data: AnalysisResult):
         colWidths=[6.2 * inch]
     )
 
-    table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, -1), colors.Color(0.95, 0.88, 0.55)),
-        ("BOX", (0, 0), (-1, -1), 2, colors.Color(0.8, 0.65, 0.15)),
-        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-        ("TOPPADDING", (0, 0), (-1, -1), 12),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 12),
-    ]))
+    table.setStyle(_SCORE_TABLE_STYLE)
 
     elements.append(table)
     elements.append(Spacer(1, 0.3 * inch))
 
     # Divider
-    elements.append(Paragraph("<para alignment='center'><font color='#C9A227'>────────────────────────────────────────</font></para>", body_style))
+    elements.append(HRFlowable(
+        width="100%",
+        thickness=1.2,
+        color=colors.HexColor("#C9A227"),
+        spaceBefore=6,
+        spaceAfter=6,
+    ))
     elements.append(Spacer(1, 0.2 * inch))
 
     # -----------------------------
     # SUMMARY BLOCK
     # -----------------------------
-    elements.append(Paragraph("Professional Summary", header_style))
+    elements.append(Paragraph("Professional Summary", _HEADER_STYLE))
     elements.append(Spacer(1, 0.1 * inch))
-    elements.append(Paragraph(data.summary.replace("\n", "<br/>"), body_style))
+    elements.append(Paragraph(_markup(data.summary), _BODY_STYLE))
     elements.append(Spacer(1, 0.25 * inch))
 
     # -----------------------------
     # STRENGTHS (in gold box)
     # -----------------------------
     if data.strengths:
-        elements.append(Paragraph("Key Strengths", header_style))
+        elements.append(Paragraph("Key Strengths", _HEADER_STYLE))
         elements.append(Spacer(1, 0.15 * inch))
 
-        for s in data.strengths:
-            elements.append(Paragraph(f"• {s}", bullet_style))
-
+        elements.append(_bullet_paragraph(data.strengths))
         elements.append(Spacer(1, 0.3 * inch))
 
     # -----------------------------
     # WEAKNESSES (in red box)
     # -----------------------------
-    elements.append(Paragraph("Areas for Improvement", header_style))
+    elements.append(Paragraph("Areas for Improvement", _HEADER_STYLE))
     elements.append(Spacer(1, 0.15 * inch))
 
-    for w in data.weaknesses:
-        elements.append(Paragraph(f"• {w}", bullet_style))
-
+    elements.append(_bullet_paragraph(data.weaknesses))
     elements.append(Spacer(1, 0.3 * inch))
 
     # -----------------------------
     # SKILLS – Skill Badge Table
     # -----------------------------
-    elements.append(Paragraph("Detected Skills", header_style))
+    elements.append(Paragraph("Detected Skills", _HEADER_STYLE))
     elements.append(Spacer(1, 0.15 * inch))
 
     skill_rows = []
@@ -301,17 +1067,8 @@ async def download_report(data: AnalysisResult):
 
     for i, skill in enumerate(data.skills):
         badge = Paragraph(
-            f"<para alignment='center'><b>{skill}</b></para>",
-            ParagraphStyle(
-                "badge",
-                backColor="#EFEFEF",
-                borderColor="#C9A227",
-                borderWidth=1,
-                borderRadius=5,
-                alignment=1,
-                padding=4,
-                leading=14,
-            )
+            f"<para alignment='center'><b>{_markup(skill)}</b></para>",
+            _BADGE_STYLE,
         )
         row.append(badge)
 
@@ -323,19 +1080,17 @@ async def download_report(data: AnalysisResult):
         skill_rows.append(row)
 
     skill_table = Table(skill_rows, colWidths=[2 * inch])
-    skill_table.setStyle(TableStyle([("ALIGN", (0, 0), (-1, -1), "CENTER")]))
+    skill_table.setStyle(_SKILL_TABLE_STYLE)
     elements.append(skill_table)
     elements.append(Spacer(1, 0.3 * inch))
 
     # -----------------------------
     # SUGGESTIONS
     # -----------------------------
-    elements.append(Paragraph("Suggestions for Improvement", header_style))
+    elements.append(Paragraph("Suggestions for Improvement", _HEADER_STYLE))
     elements.append(Spacer(1, 0.15 * inch))
 
-    for s in data.suggestions:
-        elements.append(Paragraph(f"• {s}", bullet_style))
-
+    elements.append(_bullet_paragraph(data.suggestions))
     elements.append(Spacer(1, 0.4 * inch))
 
     # New Page for Improved Resume
@@ -344,24 +1099,40 @@ async def download_report(data: AnalysisResult):
     # -----------------------------
     # IMPROVED RESUME (premium layout)
     # -----------------------------
-    elements.append(Paragraph("AI-Optimized Resume", title_style))
+    elements.append(Paragraph("AI-Optimized Resume", _TITLE_STYLE))
     elements.append(Spacer(1, 0.3 * inch))
 
-    improved_resume_text = data.improvedResume.replace("\n", "<br/>")
-    elements.append(Paragraph(improved_resume_text, body_style))
+    elements.append(Paragraph(_markup(data.improvedResume), _BODY_STYLE))
 
     # -----------------------------
     # BUILD DOCUMENT
     # -----------------------------
-    doc.build(elements)
+    try:
+        doc.build(elements)
+        return buffer.getvalue()
+    finally:
+        _release_buffer(buffer)
 
-    buffer.seek(0)
 
-    return StreamingResponse(
-        buffer,
-        media_type="application/pdf",
-        headers={"Content-Disposition": "attachment; filename=UltraPremium_Resume_Report.pdf"},
-    )
+@app.post("/download-report")
+async def download_report(data: AnalysisResult, request: Request):
+
+    etag = _report_etag(data)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304)
+
+    cached = _pdf_cache.get(etag)
+    if cached is not None:
+        return _pdf_response(cached, etag)
+
+    if PDF_BACKEND == "fpdf2":
+        pdf_bytes = await _run_in_worker(_build_report_fpdf, data)
+    else:
+        pdf_bytes = await _run_in_worker(_build_report_reportlab, data)
+
+    _pdf_cache[etag] = pdf_bytes
+
+    return _pdf_response(pdf_bytes, etag)
 
 # ---------------------------
 # ROOT ROUTE